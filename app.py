@@ -1,58 +1,106 @@
 import os
 import io
+import sys
 import csv
-import json
 from decimal import Decimal
-import importlib.util
 from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, send_file
+from functools import lru_cache
+from importlib.util import find_spec
+from itertools import compress
+from operator import itemgetter
+from flask import Flask, Response, render_template, request, redirect, url_for, send_file, stream_with_context
 from werkzeug.utils import secure_filename
+from caculate_auto import compute_summary, dump_json_bytes
 import tempfile
 import uuid
+import unicodedata
+from urllib.parse import quote
 
 BASE_DIR = os.path.dirname(__file__)
 TRANSACTIONS_DIR = os.path.join(BASE_DIR, 'Transactions')
 UPLOADS_DIR = os.path.join(BASE_DIR, 'Uploads')
 
-# Dynamically load compute_summary from Caculate-auto.py (hyphenated filename)
-_script_path = os.path.join(BASE_DIR, 'Caculate-auto.py')
-spec = importlib.util.spec_from_file_location("calc_module", _script_path)
-calc_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(calc_module)
-compute_summary = getattr(calc_module, 'compute_summary')
 
-# Optional export libs
-try:
-    from openpyxl import Workbook
-    HAS_OPENPYXL = True
-except Exception:
-    HAS_OPENPYXL = False
+@lru_cache(maxsize=128)
+def _cached_compute(csv_path: str, mtime: float, person: str, paid_on: str, start: str):
+    # mtime is part of the key so an edited/re-uploaded file is recomputed.
+    # The returned dict is shared between requests: treat it as read-only.
+    return compute_summary(csv_path, person=person, paid_on=paid_on or None, start=start or None)
+
+
+def _summary_for(csv_path: str, person: str, paid_on, start):
+    # A single stat both checks existence and yields the cache key's mtime; None if missing
+    path = os.path.abspath(csv_path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _cached_compute(path, st.st_mtime, person, paid_on or '', start or '')
+
+# Optional export libs: only check they are installed; the modules are imported on first use
+HAS_OPENPYXL = find_spec('openpyxl') is not None
+HAS_REPORTLAB = find_spec('reportlab') is not None
+
+
+@lru_cache(maxsize=1)
+def _openpyxl_ready() -> bool:
+    # Import once; an installed-but-broken package counts as unavailable
+    if not HAS_OPENPYXL:
+        return False
+    try:
+        import openpyxl  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+@lru_cache(maxsize=1)
+def _reportlab_ready() -> bool:
+    if not HAS_REPORTLAB:
+        return False
+    try:
+        import reportlab.platypus  # noqa: F401
+        import reportlab.pdfbase.ttfonts  # noqa: F401
+    except Exception:
+        return False
+    return True
 
 try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    HAS_REPORTLAB = True
+    from flask_compress import Compress
+    HAS_COMPRESS = True
 except Exception:
-    HAS_REPORTLAB = False
+    HAS_COMPRESS = False
 
 app = Flask(__name__)
+# Nén gzip các trang và file xuất dạng text (CSV/JSON/MD nén được nhiều lần)
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'text/csv', 'application/json', 'text/markdown']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+if HAS_COMPRESS:
+    Compress(app)
 
 # Ensure required directories exist
 for d in [TRANSACTIONS_DIR, UPLOADS_DIR]:
     os.makedirs(d, exist_ok=True)
 
 
+# Directory mtime changes whenever a file is added, removed or renamed.
+# Stored as one (mtime, files) tuple so threaded workers never see a half-updated entry.
+_list_cache = (None, ())
+
+
 def list_transaction_files():
-    if not os.path.isdir(TRANSACTIONS_DIR):
+    global _list_cache
+    try:
+        mtime = os.stat(TRANSACTIONS_DIR).st_mtime_ns
+    except OSError:
         return []
-    files = [f for f in os.listdir(TRANSACTIONS_DIR) if os.path.isfile(os.path.join(TRANSACTIONS_DIR, f))]
-    files.sort()
-    return files
+    cached_mtime, cached_files = _list_cache
+    if mtime == cached_mtime:
+        return list(cached_files)
+    with os.scandir(TRANSACTIONS_DIR) as it:
+        files = tuple(sorted(e.name for e in it if e.is_file()))
+    _list_cache = (mtime, files)
+    return list(files)
 
 
 @app.route('/', methods=['GET'])
@@ -115,11 +163,10 @@ def result_view():
         return redirect(url_for('index'))
 
     csv_path = _resolve_path(file_name, uploaded_flag)
-    if not os.path.exists(csv_path):
+    data = _summary_for(csv_path, person, paid_on, start)
+    if data is None:
         return redirect(url_for('index'))
 
-    data = compute_summary(csv_path, person=person, paid_on=paid_on, start=start)
-
     # Convert to display-friendly values
     def fmt_int_str(s):
         v = Decimal(s).quantize(Decimal('1'))
@@ -135,9 +182,9 @@ def result_view():
     }
 
     available_exports = ['csv', 'json', 'md']
-    if HAS_OPENPYXL:
+    if _openpyxl_ready():
         available_exports.append('xlsx')
-    if HAS_REPORTLAB:
+    if _reportlab_ready():
         available_exports.append('pdf')
 
     # Parameters (also keep filters for sharing)
@@ -153,18 +200,7 @@ def result_view():
         'category': (request.args.get('category') or ''),
     }
 
-    # Collect categories for filter
-    categories = set()
-    for r in data['shared_rows']:
-        if r.get('category'):
-            categories.add(r['category'])
-    for r in data['applied_payments']:
-        if r.get('category'):
-            categories.add(r['category'])
-    for r in data['unapplied_payments']:
-        if r.get('category'):
-            categories.add(r['category'])
-    categories = sorted(categories)
+    categories = data['categories']
 
     return render_template(
         'result.html',
@@ -184,6 +220,110 @@ def _resolve_path(file_name: str, uploaded_flag: str) -> str:
     return os.path.join(TRANSACTIONS_DIR, file_name)
 
 
+def _parse_ymd(s: str):
+    try:
+        return datetime.strptime(s, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _row_date(date_str: str):
+    # Memoized instead of stored on the row: summary rows are shared via _cached_compute
+    try:
+        return datetime.fromisoformat(date_str.split('+', 1)[0]).date()
+    except ValueError:
+        return None
+
+
+def _attachment_options(download_name: str) -> dict:
+    # Same Content-Disposition encoding send_file uses for non-ASCII names (e.g. "Quân")
+    try:
+        download_name.encode('ascii')
+        return {'filename': download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': "UTF-8''" + quote(download_name, safe="!#$&+-.^_`|~")}
+
+
+class _RowBuffer:
+    """Minimal file-like sink so csv.writer output can be drained in chunks."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, s):
+        self.parts.append(s)
+        self.size += len(s)
+
+    def drain(self) -> bytes:
+        out = ''.join(self.parts).encode('utf-8')
+        self.parts.clear()
+        self.size = 0
+        return out
+
+
+def _summary_csv_rows(filtered):
+    yield ['section', 'date', 'category', 'note', 'amount', 'share', 'reason']
+    for r in filtered['shared_rows']:
+        yield ['shared', r['date'], r['category'], r['note'], r['amount'], r['share'], r['reason']]
+    yield []
+    yield ['applied_payment', 'date', 'category', 'note', 'amount']
+    for r in filtered['applied_payments']:
+        yield ['applied', r['date'], r['category'], r['note'], r['amount']]
+    yield []
+    yield ['unapplied_payment', 'date', 'category', 'note', 'amount']
+    for r in filtered['unapplied_payments']:
+        yield ['unapplied', r['date'], r['category'], r['note'], r['amount']]
+    yield []
+    yield ['total_shared', filtered['totals']['total_shared']]
+    yield ['total_paid_by_person', filtered['totals']['total_paid_by_person']]
+    yield ['remaining', filtered['totals']['remaining']]
+
+
+_MD_ESC = str.maketrans({'|': '\\|'})
+
+
+def _summary_md_lines(filtered, person, base_name):
+    yield f"# Summary for {person} - {base_name}\n\n"
+    yield '## Totals\n'
+    yield f"- Total shared: {filtered['totals']['total_shared']}\n"
+    yield f"- Total paid by {person}: {filtered['totals']['total_paid_by_person']}\n"
+    yield f"- Remaining: {filtered['totals']['remaining']}\n\n"
+    yield '## Shared rows\n\n'
+    yield '| date | category | note | amount | share | reason |\n'
+    yield '|---|---|---|---:|---:|---|\n'
+    for r in filtered['shared_rows']:
+        yield f"| {r['date']} | {r['category']} | {(r['note'] or '').translate(_MD_ESC)} | {r['amount']} | {r['share']} | {r['reason']} |\n"
+    yield '\n## Applied payments\n\n'
+    yield '| date | category | note | amount |\n'
+    yield '|---|---|---|---:|\n'
+    for r in filtered['applied_payments']:
+        yield f"| {r['date']} | {r['category']} | {(r['note'] or '').translate(_MD_ESC)} | {r['amount']} |\n"
+    yield '\n## Unapplied payments\n\n'
+    yield '| date | category | note | amount |\n'
+    yield '|---|---|---|---:|\n'
+    for r in filtered['unapplied_payments']:
+        yield f"| {r['date']} | {r['category']} | {(r['note'] or '').translate(_MD_ESC)} | {r['amount']} |\n"
+
+
+_STREAM_CHUNK = 16 * 1024
+_XLSX_SPOOL_MAX = 8 * 1024 * 1024
+
+
+def _stream_summary_csv(filtered):
+    # Yield ~16 KiB chunks: one WSGI write per row costs more than the rows themselves
+    buf = _RowBuffer()
+    w = csv.writer(buf)
+    for row in _summary_csv_rows(filtered):
+        w.writerow(row)
+        if buf.size >= _STREAM_CHUNK:
+            yield buf.drain()
+    if buf.parts:
+        yield buf.drain()
+
+
 @app.route('/export/<fmt>', methods=['GET'])
 def export(fmt: str):
     fmt = (fmt or '').lower()
@@ -201,126 +341,64 @@ def export(fmt: str):
         return redirect(url_for('index'))
 
     csv_path = _resolve_path(file_name, uploaded_flag)
-    if not os.path.exists(csv_path):
+    data = _summary_for(csv_path, person, paid_on, start)
+    if data is None:
         return redirect(url_for('index'))
-
-    data = compute_summary(csv_path, person=person, paid_on=paid_on, start=start)
     base_name = os.path.splitext(os.path.basename(file_name))[0]
 
-    # Filtering helpers
+    # Filtering helpers; an unparsable bound is ignored, as before
+    s_date = _parse_ymd(start_date) if start_date else None
+    e_date = _parse_ymd(end_date) if end_date else None
+
     def in_range(date_str):
-        if not (start_date or end_date):
-            return True
-        try:
-            dt = datetime.fromisoformat(date_str.split('+')[0])
-            d = dt.date()
-        except Exception:
+        d = _row_date(date_str)
+        if d is None:
             return False
-        if start_date:
-            try:
-                s = datetime.strptime(start_date, '%Y-%m-%d').date()
-                if d < s:
-                    return False
-            except Exception:
-                pass
-        if end_date:
-            try:
-                e = datetime.strptime(end_date, '%Y-%m-%d').date()
-                if d > e:
-                    return False
-            except Exception:
-                pass
-        return True
-
-    def matches_q_row(row_dict):
-        if not q:
-            return True
-        for key in ('date','category','note','amount','share','reason'):
-            val = str(row_dict.get(key, '')).lower()
-            if q in val:
-                return True
-        return False
-
-    def matches_q_pay(row_dict):
-        if not q:
-            return True
-        for key in ('date','category','note','amount'):
-            val = str(row_dict.get(key, '')).lower()
-            if q in val:
-                return True
-        return False
-
-    def matches_category(cat):
-        if not category:
-            return True
-        return (cat or '').lower() == category.lower()
+        return (s_date is None or d >= s_date) and (e_date is None or d <= e_date)
+
+    category_lc = category.lower()
+
+    def apply_filters(rows, keys):
+        # Column-wise boolean mask: each active filter narrows it in one pass,
+        # inactive filters cost nothing per row.
+        mask = [True] * len(rows)
+        if start_date or end_date:
+            mask = [m and in_range(r['date']) for m, r in zip(mask, rows)]
+        if category:
+            mask = [m and (r['category'] or '').lower() == category_lc for m, r in zip(mask, rows)]
+        if q:
+            # One lower() per row over the joined fields; NUL keeps matches from spanning two fields
+            fields = itemgetter(*keys)
+            mask = [m and q in '\0'.join(fields(r)).lower() for m, r in zip(mask, rows)]
+        return list(compress(rows, mask))
 
     # Apply filters
     filtered = {
-        'shared_rows': [r for r in data['shared_rows'] if in_range(r['date']) and matches_category(r['category']) and matches_q_row(r)],
-        'applied_payments': [r for r in data['applied_payments'] if in_range(r['date']) and matches_category(r['category']) and matches_q_pay(r)],
-        'unapplied_payments': [r for r in data['unapplied_payments'] if in_range(r['date']) and matches_category(r['category']) and matches_q_pay(r)],
+        'shared_rows': apply_filters(data['shared_rows'], ('date','category','note','amount','share','reason')),
+        'applied_payments': apply_filters(data['applied_payments'], ('date','category','note','amount')),
+        'unapplied_payments': apply_filters(data['unapplied_payments'], ('date','category','note','amount')),
         'totals': data['totals'],
     }
 
     if fmt == 'csv':
-        bio = io.StringIO()
-        w = csv.writer(bio)
-        w.writerow(['section', 'date', 'category', 'note', 'amount', 'share', 'reason'])
-        for r in filtered['shared_rows']:
-            w.writerow(['shared', r['date'], r['category'], r['note'], r['amount'], r['share'], r['reason']])
-        w.writerow([])
-        w.writerow(['applied_payment', 'date', 'category', 'note', 'amount'])
-        for r in filtered['applied_payments']:
-            w.writerow(['applied', r['date'], r['category'], r['note'], r['amount']])
-        w.writerow([])
-        w.writerow(['unapplied_payment', 'date', 'category', 'note', 'amount'])
-        for r in filtered['unapplied_payments']:
-            w.writerow(['unapplied', r['date'], r['category'], r['note'], r['amount']])
-        w.writerow([])
-        w.writerow(['total_shared', filtered['totals']['total_shared']])
-        w.writerow(['total_paid_by_person', filtered['totals']['total_paid_by_person']])
-        w.writerow(['remaining', filtered['totals']['remaining']])
-        bytes_io = io.BytesIO(bio.getvalue().encode('utf-8'))
-        return send_file(bytes_io, as_attachment=True, download_name=f"{base_name}.{person}.summary.csv", mimetype='text/csv')
+        resp = Response(stream_with_context(_stream_summary_csv(filtered)), mimetype='text/csv')
+        resp.headers.set('Content-Disposition', 'attachment', **_attachment_options(f"{base_name}.{person}.summary.csv"))
+        return resp
 
     if fmt == 'json':
-        content = json.dumps(filtered, ensure_ascii=False, indent=2)
-        bytes_io = io.BytesIO(content.encode('utf-8'))
-        return send_file(bytes_io, as_attachment=True, download_name=f"{base_name}.{person}.summary.json", mimetype='application/json')
+        # orjson already hands back bytes: send them as the body rather than via a BytesIO file wrapper
+        resp = Response(dump_json_bytes(filtered), mimetype='application/json')
+        resp.headers.set('Content-Disposition', 'attachment', **_attachment_options(f"{base_name}.{person}.summary.json"))
+        return resp
 
     if fmt == 'md':
-        lines = []
-        lines.append(f"# Summary for {person} - {base_name}\n\n")
-        lines.append('## Totals\n')
-        lines.append(f"- Total shared: {filtered['totals']['total_shared']}\n")
-        lines.append(f"- Total paid by {person}: {filtered['totals']['total_paid_by_person']}\n")
-        lines.append(f"- Remaining: {filtered['totals']['remaining']}\n\n")
-        lines.append('## Shared rows\n\n')
-        lines.append('| date | category | note | amount | share | reason |\n')
-        lines.append('|---|---|---|---:|---:|---|\n')
-        for r in filtered['shared_rows']:
-            note = (r['note'] or '').replace('|', '\\|')
-            lines.append(f"| {r['date']} | {r['category']} | {note} | {r['amount']} | {r['share']} | {r['reason']} |\n")
-        lines.append('\n## Applied payments\n\n')
-        lines.append('| date | category | note | amount |\n')
-        lines.append('|---|---|---|---:|\n')
-        for r in filtered['applied_payments']:
-            note = (r['note'] or '').replace('|', '\\|')
-            lines.append(f"| {r['date']} | {r['category']} | {note} | {r['amount']} |\n")
-        lines.append('\n## Unapplied payments\n\n')
-        lines.append('| date | category | note | amount |\n')
-        lines.append('|---|---|---|---:|\n')
-        for r in filtered['unapplied_payments']:
-            note = (r['note'] or '').replace('|', '\\|')
-            lines.append(f"| {r['date']} | {r['category']} | {note} | {r['amount']} |\n")
-        bytes_io = io.BytesIO(''.join(lines).encode('utf-8'))
+        bytes_io = io.BytesIO(''.join(_summary_md_lines(filtered, person, base_name)).encode('utf-8'))
         return send_file(bytes_io, as_attachment=True, download_name=f"{base_name}.{person}.summary.md", mimetype='text/markdown')
 
-    if fmt == 'xlsx' and HAS_OPENPYXL:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = 'shared'
+    if fmt == 'xlsx' and _openpyxl_ready():
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('shared')
         ws.append(['date', 'category', 'note', 'amount', 'share', 'reason'])
         for r in filtered['shared_rows']:
             ws.append([r['date'], r['category'], r['note'], r['amount'], r['share'], r['reason']])
@@ -336,12 +414,19 @@ def export(fmt: str):
         ws4.append(['total_shared', filtered['totals']['total_shared']])
         ws4.append(['total_paid_by_person', filtered['totals']['total_paid_by_person']])
         ws4.append(['remaining', filtered['totals']['remaining']])
-        bytes_io = io.BytesIO()
-        wb.save(bytes_io)
-        bytes_io.seek(0)
-        return send_file(bytes_io, as_attachment=True, download_name=f"{base_name}.{person}.summary.xlsx", mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-
-    if fmt == 'pdf' and HAS_REPORTLAB:
+        # Spool to a temp file once the archive grows large; send_file closes (and so deletes) it
+        out = tempfile.SpooledTemporaryFile(max_size=_XLSX_SPOOL_MAX)
+        wb.save(out)
+        out.seek(0)
+        return send_file(out, as_attachment=True, download_name=f"{base_name}.{person}.summary.xlsx", mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', max_age=0)
+
+    if fmt == 'pdf' and _reportlab_ready():
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib import colors
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
         bytes_io = io.BytesIO()
         
         # Đăng ký phông chữ Unicode hỗ trợ tiếng Việt (ưu tiên Arial từ Windows)
@@ -615,12 +700,14 @@ def table_export():
         })
 
     # Build CSV for download
-    bio = io.StringIO()
-    w = csv.DictWriter(bio, fieldnames=['Date','Wallet','Type','Category name','Amount','Currency','Note','Labels','Author'])
+    # Encode straight into the byte buffer (no StringIO copy); detach so the wrapper doesn't close it
+    bytes_io = io.BytesIO()
+    tw = io.TextIOWrapper(bytes_io, encoding='utf-8', newline='', write_through=True)
+    w = csv.DictWriter(tw, fieldnames=['Date','Wallet','Type','Category name','Amount','Currency','Note','Labels','Author'])
     w.writeheader()
-    for r in rows:
-        w.writerow(r)
-    bytes_io = io.BytesIO(bio.getvalue().encode('utf-8'))
+    w.writerows(rows)
+    tw.detach()
+    bytes_io.seek(0)
     fname = f"edited_{datetime.now().strftime('%Y%m%d-%H%M%S')}.csv"
     return send_file(bytes_io, as_attachment=True, download_name=fname, mimetype='text/csv')
 
@@ -688,4 +775,6 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     # Trong production, debug sẽ dựa trên biến môi trường
     debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
+    # Server dev của Werkzeug chỉ dùng khi chạy local; production chạy gunicorn (xem Procfile/render.yaml)
+    print('Dev server. Production: gunicorn app:app --workers 2 --threads 4', file=sys.stderr)
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+caculate_auto.py
+
+Tính số tiền một người (mặc định: Quân) cần trả dựa trên file CSV trong thư mục Transactions.
+
+Chú ý: Google Sheets support đã bị loại bỏ theo yêu cầu.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import csv
+import os
+import re
+import argparse
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Optional, List
+from datetime import date, datetime, time, timedelta
+import json
+import sys
+
+# optional libraries for exports (imported only when that export runs)
+HAS_OPENPYXL = find_spec('openpyxl') is not None
+HAS_REPORTLAB = find_spec('reportlab') is not None
+
+# pyarrow is heavy (tens of MB per process); it is imported on the first compute_summary call
+HAS_ARROW = find_spec('pyarrow') is not None
+
+try:
+	import orjson
+	HAS_ORJSON = True
+except Exception:
+	HAS_ORJSON = False
+
+TRANSACTIONS_DIR = 'Transactions'
+# Share of an expense owed when the note has no explicit amount (SPLIT_NUM / SPLIT_DEN)
+SPLIT_NUM, SPLIT_DEN = 1, 2
+
+_INT_RE = re.compile(r'-?[0-9]+')
+# A "k"-suffixed amount (thousands) or a plain number; the gap before "k" may not cross a line break
+_AMT_RE = re.compile(
+	r'(?P<kval>[0-9]+(?:[.,][0-9]{0,3})?)[^\S\r\n]*[kK]\b'
+	r'|(?P<plain>[0-9]{1,3}(?:[.,][0-9]{3})+|[0-9]+)\b'
+)
+_NL_RE = re.compile(r'[\r\n]')
+
+def parse_decimal(s: str) -> Decimal:
+	try:
+		if s is None or str(s).strip() == '':
+			return Decimal('0')
+		return Decimal(str(s))
+	except Exception:
+		m = _INT_RE.search(str(s) or '')
+		if m:
+			return Decimal(m.group(0))
+		return Decimal('0')
+
+def _parse_int(s: str) -> int:
+	"""Parse an amount cell into whole VND (rounding any fractional part half away from zero)."""
+	if s is None:
+		return 0
+	s = str(s).strip()
+	if s == '':
+		return 0
+	try:
+		return int(s)
+	except ValueError:
+		pass
+	whole, sep, frac = s.partition('.')
+	if sep and frac.isdigit() and whole.lstrip('+-').isdigit():
+		v = int(whole)
+		if frac[0] >= '5':
+			v += -1 if whole.startswith('-') else 1
+		return v
+	# Exponents ('1.5e3' from str(float)), '.5' and the like: let Decimal decide
+	try:
+		return int(Decimal(s).to_integral_value(ROUND_HALF_UP))
+	except (InvalidOperation, ValueError, OverflowError):
+		pass
+	m = _INT_RE.search(s)
+	if m:
+		return int(m.group(0))
+	return 0
+
+def contains_person(text: str, person: str) -> bool:
+	if not text:
+		return False
+	return person.lower() in text.lower()
+
+def extract_amount_from_note(note: str) -> Optional[int]:
+	if not note:
+		return None
+	# The first line holding a number wins; within that line a "k" amount beats a plain one
+	plain = None
+	line_end = -1
+	for m in _AMT_RE.finditer(note):
+		if plain is not None and m.start() >= line_end:
+			break
+		kval = m.group('kval')
+		if kval is not None:
+			return int(kval.replace('.', '').replace(',', '')) * 1000
+		if plain is None:
+			plain = m.group('plain')
+			nl = _NL_RE.search(note, m.end())
+			line_end = nl.start() if nl else len(note)
+	if plain is not None:
+		return int(plain.replace('.', '').replace(',', ''))
+	return None
+
+@lru_cache(maxsize=8192)
+def _parse_dt(date_str: str) -> Optional[datetime]:
+	n = len(date_str)
+	if n >= 10 and date_str[4] == '-' and date_str[7] == '-':
+		if n == 10:
+			try:
+				return datetime.combine(date.fromisoformat(date_str), time())
+			except ValueError:
+				return None
+		# Exports look like 2025-10-18T09:10:04+00:00; only the local part matters
+		plus = date_str.find('+', 19)
+		if plus != -1:
+			date_str = date_str[:plus]
+	try:
+		dt = datetime.fromisoformat(date_str)
+	except ValueError:
+		head, sep, _ = date_str.partition('+')
+		if not sep:
+			return None
+		try:
+			dt = datetime.fromisoformat(head)
+		except ValueError:
+			return None
+	# '-05:00' and 'Z' offsets get past the cut above; drop them so every result compares (naive, local time)
+	if dt.tzinfo is not None:
+		dt = dt.replace(tzinfo=None)
+	return dt
+
+def _on_or_after(date_str: str, dt: Optional[datetime], cutoff_date: Optional[date], cutoff_str: Optional[str]) -> bool:
+	if cutoff_date is None:
+		return True
+	if dt is None:
+		return False
+	if len(date_str) >= 10 and date_str[4] == '-' and date_str[7] == '-':
+		return date_str[:10] >= cutoff_str
+	return dt.date() >= cutoff_date
+
+def dump_json_bytes(obj) -> bytes:
+	"""Serialize to indented UTF-8 JSON, using orjson when it is installed."""
+	if HAS_ORJSON:
+		return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+	return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+def list_transaction_files(base: str) -> List[str]:
+	d = os.path.join(base, TRANSACTIONS_DIR)
+	if not os.path.isdir(d):
+		return []
+	with os.scandir(d) as it:
+		return sorted(e.name for e in it if e.is_file())
+
+_SUMMARY_COLUMNS = ('Amount', 'Category name', 'Note', 'Date')
+
+def _read_rows_csv(csv_path: str):
+	"""Yield (amount, category, note, date) string tuples for every row of the CSV."""
+	with open(csv_path, encoding='utf-8-sig', newline='') as f:
+		reader = csv.reader(f)
+		header = next(reader, [])
+		# Missing columns point at a trailing padding slot that always reads ''
+		missing = len(header)
+		idx_amt, idx_cat, idx_note, idx_date = (
+			header.index(c) if c in header else missing for c in _SUMMARY_COLUMNS
+		)
+		width = missing + 1
+		for row in reader:
+			if not row:
+				continue
+			if len(row) < width:
+				row.extend([''] * (width - len(row)))
+			yield row[idx_amt], row[idx_cat], row[idx_note], row[idx_date]
+
+@lru_cache(maxsize=1)
+def _get_arrow():
+	"""Return (pyarrow, pyarrow.compute, pyarrow.csv), or None if pyarrow fails to import."""
+	try:
+		import pyarrow as pa
+		import pyarrow.compute as pc
+		import pyarrow.csv as pacsv
+	except Exception:
+		return None
+	return pa, pc, pacsv
+
+def _read_rows_arrow(csv_path: str, person_lc: str) -> list:
+	"""
+	Read the CSV with pyarrow and return (amount, category, note, date) tuples
+	for rows whose note or category mentions the person.
+
+	The person filter runs as a vectorized kernel per record batch, so unrelated
+	rows never become Python objects. Raises pa.ArrowInvalid on malformed input.
+	"""
+	pa, pc, pacsv = _get_arrow()
+	convert = pacsv.ConvertOptions(
+		include_columns=list(_SUMMARY_COLUMNS),
+		include_missing_columns=True,
+		column_types={c: pa.string() for c in _SUMMARY_COLUMNS},
+		strings_can_be_null=False,
+		quoted_strings_can_be_null=False,
+	)
+	reader = pacsv.open_csv(
+		csv_path,
+		read_options=pacsv.ReadOptions(block_size=1 << 20),
+		parse_options=pacsv.ParseOptions(newlines_in_values=True),
+		convert_options=convert,
+	)
+	rows = []
+	for batch in reader:
+		cols = [pc.fill_null(batch.column(c), '') for c in _SUMMARY_COLUMNS]
+		mask = pc.or_(
+			pc.match_substring(pc.utf8_lower(cols[2]), person_lc),
+			pc.match_substring(pc.utf8_lower(cols[1]), person_lc),
+		)
+		if not pc.any(mask).as_py():
+			continue
+		rows.extend(zip(*(pc.filter(col, mask).to_pylist() for col in cols)))
+	return rows
+
+def compute_summary(csv_path: str, person: str = 'Quân', paid_on: Optional[str] = None, start: Optional[str] = None):
+	"""
+	Compute summary from a CSV file path.
+
+	Returns a dict with keys: totals, shared_rows, applied_payments, unapplied_payments,
+	categories (sorted, distinct non-empty categories across those three lists).
+	"""
+	# Matched rows are kept column-wise (one list per field) rather than as row tuples
+	pay_date, pay_dt, pay_cat, pay_note, pay_amt = [], [], [], [], []
+	sh_date, sh_dt, sh_cat, sh_note, sh_amt, sh_share, sh_reason = [], [], [], [], [], [], []
+	last_payment_dt = None
+	person_lc = person.lower()
+
+	rows = None
+	arrow = _get_arrow() if HAS_ARROW else None
+	if arrow is not None:
+		try:
+			rows = _read_rows_arrow(csv_path, person_lc)
+		except (arrow[0].ArrowInvalid, UnicodeDecodeError):
+			# e.g. ragged rows, which the csv module tolerates
+			rows = None
+	if rows is None:
+		rows = _read_rows_csv(csv_path)
+
+	for amt_str, category, note, date_str in rows:
+		# Most rows don't mention the person; skip them before any parsing
+		note_has_person = bool(note) and person_lc in note.lower()
+		if not note_has_person and not (category and person_lc in category.lower()):
+			continue
+		amt = _parse_int(amt_str)
+		dt = _parse_dt(date_str)
+
+		if amt > 0 and note_has_person:
+			if dt is not None and (last_payment_dt is None or dt > last_payment_dt):
+				last_payment_dt = dt
+			pay_date.append(date_str)
+			pay_dt.append(dt)
+			pay_cat.append(category)
+			pay_note.append(note)
+			pay_amt.append(amt)
+		elif amt < 0:
+			explicit = extract_amount_from_note(note)
+			if explicit is not None and explicit > 0:
+				share = explicit
+				reason = 'explicit_in_note'
+			else:
+				share = (abs(amt) * SPLIT_NUM + SPLIT_DEN // 2) // SPLIT_DEN
+				reason = 'split_ratio'
+			sh_date.append(date_str)
+			sh_dt.append(dt)
+			sh_cat.append(category)
+			sh_note.append(note)
+			sh_amt.append(amt)
+			sh_share.append(share)
+			sh_reason.append(reason)
+
+	cutoff_date = None
+	if start:
+		try:
+			start_dt = datetime.strptime(start, '%Y-%m-%d').date()
+			cutoff_date = start_dt
+		except Exception:
+			cutoff_date = None
+	elif paid_on:
+		try:
+			paid_on_dt = datetime.strptime(paid_on, '%Y-%m-%d').date()
+			cutoff_date = paid_on_dt + timedelta(days=1)
+		except Exception:
+			cutoff_date = None
+	elif last_payment_dt is not None:
+		# Auto-detect from the last payment seen while reading
+		cutoff_date = (last_payment_dt.date() + timedelta(days=1))
+	# ISO-8601 date prefixes sort lexicographically, so rows can be compared as strings
+	cutoff_str = cutoff_date.isoformat() if cutoff_date else None
+
+	pay_keep = [_on_or_after(d, dt, cutoff_date, cutoff_str) for d, dt in zip(pay_date, pay_dt)]
+	sh_keep = [_on_or_after(d, dt, cutoff_date, cutoff_str) for d, dt in zip(sh_date, sh_dt)]
+	total_paid_by_person = sum([a for a, k in zip(pay_amt, pay_keep) if k])
+	total_shared = sum([s for s, k in zip(sh_share, sh_keep) if k])
+
+	shared_rows = [
+		{
+			'date': d,
+			'category': cat,
+			'note': note,
+			'amount': str(amt),
+			'share': str(share),
+			'reason': reason,
+		}
+		for d, cat, note, amt, share, reason, k in zip(sh_date, sh_cat, sh_note, sh_amt, sh_share, sh_reason, sh_keep)
+		if k
+	]
+	payments = [
+		({'date': d, 'category': cat, 'note': note, 'amount': str(amt)}, k)
+		for d, cat, note, amt, k in zip(pay_date, pay_cat, pay_note, pay_amt, pay_keep)
+	]
+	applied_payments = [p for p, k in payments if k]
+	unapplied_payments = [p for p, k in payments if not k]
+	categories = set(pay_cat)
+	categories.update(c for c, k in zip(sh_cat, sh_keep) if k)
+	categories.discard('')
+
+	remaining = total_shared - total_paid_by_person
+
+	data = {
+		'totals': {
+			'total_shared': str(total_shared),
+			'total_paid_by_person': str(total_paid_by_person),
+			'remaining': str(remaining),
+			'person': person,
+			'cutoff': str(cutoff_date) if cutoff_date else None,
+		},
+		'shared_rows': shared_rows,
+		'applied_payments': applied_payments,
+		'unapplied_payments': unapplied_payments,
+		'categories': sorted(categories),
+	}
+
+	return data
+
+def main():
+	base = os.path.dirname(__file__)
+	files = list_transaction_files(base)
+
+	parser = argparse.ArgumentParser(description='Tính tiền người cần trả từ file giao dịch')
+	parser.add_argument('--file', '-f', help='Tên file CSV trong thư mục Transactions. Nếu không chỉ định sẽ hiển thị danh sách.')
+	parser.add_argument('--person', '-p', default='Quân', help='Tên người (mặc định: Quân)')
+	parser.add_argument('--paid-on', help='(Tùy chọn) Ngày Quân trả gần nhất theo định dạng YYYY-MM-DD. Nếu chỉ định, sẽ bắt đầu tính từ ngày hôm sau.')
+	parser.add_argument('--start', help='(Tùy chọn) Ngày bắt đầu tính (YYYY-MM-DD). Nếu chỉ định, sẽ bắt đầu tính từ ngày này (bao gồm ngày).')
+	parser.add_argument('--export', help='Các định dạng xuất, cách nhau bằng dấu phẩy. Hỗ trợ: csv,json,xlsx,pdf', default='')
+	parser.add_argument('--outdir', help='Thư mục xuất file (mặc định: current dir)', default='.')
+	args = parser.parse_args()
+
+	chosen_file = args.file
+	if not chosen_file:
+		if not files:
+			print('Không tìm thấy thư mục Transactions hoặc không có file nào bên trong.')
+			return
+		print('Các file trong thư mục Transactions:')
+		for i, fn in enumerate(files, 1):
+			print(f"  {i}. {fn}")
+		try:
+			sel = input('\nNhập số tương ứng để chọn file (hoặc Enter để hủy): ').strip()
+		except EOFError:
+			print('\nKhông nhận được đầu vào. Hủy.')
+			return
+		if sel == '':
+			print('Hủy chọn file.')
+			return
+		try:
+			idx = int(sel)
+			if idx < 1 or idx > len(files):
+				print('Số không hợp lệ.')
+				return
+			chosen_file = files[idx - 1]
+			print(f'Chọn file: {chosen_file}')
+		except ValueError:
+			print('Giá trị nhập không phải số.')
+			return
+
+	csv_path = os.path.join(base, TRANSACTIONS_DIR, chosen_file)
+	if not os.path.exists(csv_path):
+		print('Không tìm thấy file CSV:', csv_path)
+		return
+
+	# Use computation function
+	data = compute_summary(csv_path, person=args.person, paid_on=args.paid_on, start=args.start)
+
+	# Determine cutoff/start date. Priority:
+	# 1) --start (inclusive)
+	# 2) --paid-on (interpreted as last payment date; start = paid_on + 1 day)
+	# 3) interactive prompt (if TTY)
+	# 4) auto-detect from payments_by_person (last payment + 1 day)
+	# Derive display totals
+	cutoff_date = data['totals']['cutoff']
+	total_shared = Decimal(data['totals']['total_shared'])
+	total_paid_by_person = Decimal(data['totals']['total_paid_by_person'])
+	remaining = Decimal(data['totals']['remaining'])
+
+	shared_rows = [
+		(r['date'], r['category'], r['note'], Decimal(r['amount']), Decimal(r['share']), r['reason'])
+		for r in data['shared_rows']
+	]
+	applied_payment_rows = [
+		(r['date'], None, r['category'], r['note'], Decimal(r['amount']))
+		for r in data['applied_payments']
+	]
+	unapplied_payment_rows = [
+		(r['date'], None, r['category'], r['note'], Decimal(r['amount']))
+		for r in data['unapplied_payments']
+	]
+
+	def fmt(v: Decimal) -> str:
+		v = v.quantize(Decimal('1'))
+		s = f"{int(v):,}"
+		return s.replace(',', '.')
+
+	print('\n=== KẾT QUẢ TÍNH TOÁN ===')
+	print('Tổng phần liên quan (ưu tiên note nếu có):', fmt(total_shared), 'VND')
+	print(f'Tổng {args.person} đã trả (ghi chú/loan):', fmt(total_paid_by_person), 'VND')
+	print(f'Số tiền {args.person} còn nợ tôi:', fmt(remaining), 'VND')
+
+	if shared_rows:
+		print('\n--- Chi tiết phần liên quan ---')
+		for d, cat, note, amt, share, reason in shared_rows:
+			print(d, '|', cat, '|', note or '', '| amount:', int(amt), '| share:', int(share), '| reason:', reason)
+
+	if applied_payment_rows or unapplied_payment_rows:
+		print('\n--- Chi tiết các khoản đã trả bởi người ---')
+		if applied_payment_rows:
+			print('\nCác khoản áp dụng cho kỳ hiện tại:')
+			for d, dt, cat, note, amt in applied_payment_rows:
+				print(d, '|', cat, '|', note or '', '| amount:', int(amt))
+		if unapplied_payment_rows:
+			print('\nCác khoản không áp dụng (trước cutoff):')
+			for d, dt, cat, note, amt in unapplied_payment_rows:
+				print(d, '|', cat, '|', note or '', '| amount:', int(amt))
+
+	# Exporting
+	if not args.export:
+		opts = [
+			('csv', 'CSV', True),
+			('json', 'JSON', True),
+			('md', 'Markdown', True),
+			('xlsx', 'XLSX', HAS_OPENPYXL),
+			('pdf', 'PDF', HAS_REPORTLAB),
+		]
+		print('\nBạn có thể xuất kết quả sang các định dạng sau:')
+		for i, (_, label, avail) in enumerate(opts, 1):
+			print(f"  {i}. {label}" + ('' if avail else ' (không khả dụng; cần cài đặt)'))
+		try:
+			sel = input('\nNhập số tương ứng để chọn (ví dụ: 1 hoặc 1,3). Enter để bỏ qua xuất file: ').strip()
+		except EOFError:
+			sel = ''
+		selected = []
+		if sel:
+			parts = [p.strip() for p in sel.split(',') if p.strip()]
+			for p in parts:
+				try:
+					idx = int(p)
+				except Exception:
+					continue
+				if idx < 1 or idx > len(opts):
+					continue
+				key, label, avail = opts[idx-1]
+				if not avail:
+					print(f"Bỏ qua {label}: chưa cài gói cần thiết.")
+					continue
+				selected.append(key)
+			args.export = ','.join(selected)
+
+	exports = [x.strip().lower() for x in (args.export or '').split(',') if x.strip()]
+	if exports:
+		outdir = args.outdir
+		if not os.path.isdir(outdir):
+			try:
+				os.makedirs(outdir, exist_ok=True)
+			except Exception as e:
+				print('Không thể tạo thư mục xuất:', e)
+				return
+
+		base_name = os.path.splitext(os.path.basename(chosen_file))[0]
+		# reuse data from computation
+
+		for fmt in exports:
+			if fmt == 'csv':
+				out_csv = os.path.join(outdir, f"{base_name}.{args.person}.summary.csv")
+				try:
+					with open(out_csv, 'w', encoding='utf-8', newline='') as fo:
+						w = csv.writer(fo)
+						w.writerow(['section', 'date', 'category', 'note', 'amount', 'share', 'reason'])
+						for r in data['shared_rows']:
+							w.writerow(['shared', r['date'], r['category'], r['note'], r['amount'], r['share'], r['reason']])
+						w.writerow([])
+						w.writerow(['applied_payment', 'date', 'category', 'note', 'amount'])
+						for r in data['applied_payments']:
+							w.writerow(['applied', r['date'], r['category'], r['note'], r['amount']])
+						w.writerow([])
+						w.writerow(['unapplied_payment', 'date', 'category', 'note', 'amount'])
+						for r in data['unapplied_payments']:
+							w.writerow(['unapplied', r['date'], r['category'], r['note'], r['amount']])
+						w.writerow([])
+						w.writerow(['total_shared', data['totals']['total_shared']])
+						w.writerow(['total_paid_by_person', data['totals']['total_paid_by_person']])
+						w.writerow(['remaining', data['totals']['remaining']])
+				except Exception as e:
+					print('Lỗi khi ghi CSV:', e)
+				else:
+					print('Đã xuất CSV ->', out_csv)
+
+			elif fmt == 'json':
+				out_json = os.path.join(outdir, f"{base_name}.{args.person}.summary.json")
+				try:
+					with open(out_json, 'wb') as fo:
+						fo.write(dump_json_bytes(data))
+				except Exception as e:
+					print('Lỗi khi ghi JSON:', e)
+				else:
+					print('Đã xuất JSON ->', out_json)
+
+			elif fmt == 'md':
+				out_md = os.path.join(outdir, f"{base_name}.{args.person}.summary.md")
+				try:
+					with open(out_md, 'w', encoding='utf-8') as mf:
+						mf.write(f"# Summary for {args.person} - {base_name}\n\n")
+						mf.write('## Totals\n')
+						mf.write(f"- Total shared: {data['totals']['total_shared']}\n")
+						mf.write(f"- Total paid by {args.person}: {data['totals']['total_paid_by_person']}\n")
+						mf.write(f"- Remaining: {data['totals']['remaining']}\n\n")
+						mf.write('## Shared rows\n\n')
+						mf.write('| date | category | note | amount | share | reason |\n')
+						mf.write('|---|---|---|---:|---:|---|\n')
+						for r in data['shared_rows']:
+							note_safe = (r['note'] or '').replace('|', '\\|')
+							mf.write(f"| {r['date']} | {r['category']} | {note_safe} | {r['amount']} | {r['share']} | {r['reason']} |\n")
+						mf.write('\n## Applied payments\n\n')
+						mf.write('| date | category | note | amount |\n')
+						mf.write('|---|---|---|---:|\n')
+						for r in data['applied_payments']:
+							note_safe = (r['note'] or '').replace('|', '\\|')
+							mf.write(f"| {r['date']} | {r['category']} | {note_safe} | {r['amount']} |\n")
+						mf.write('\n## Unapplied payments\n\n')
+						mf.write('| date | category | note | amount |\n')
+						mf.write('|---|---|---|---:|\n')
+						for r in data['unapplied_payments']:
+							note_safe = (r['note'] or '').replace('|', '\\|')
+							mf.write(f"| {r['date']} | {r['category']} | {note_safe} | {r['amount']} |\n")
+				except Exception as e:
+					print('Lỗi khi ghi Markdown:', e)
+				else:
+					print('Đã xuất Markdown ->', out_md)
+
+			elif fmt == 'xlsx':
+				if not HAS_OPENPYXL:
+					print('openpyxl không được cài đặt. Bỏ qua XLSX export. Cài bằng: pip install openpyxl')
+					continue
+				out_xlsx = os.path.join(outdir, f"{base_name}.{args.person}.summary.xlsx")
+				try:
+					from openpyxl import Workbook
+					wb = Workbook(write_only=True)
+					ws = wb.create_sheet('shared')
+					ws.append(['date', 'category', 'note', 'amount', 'share', 'reason'])
+					for r in data['shared_rows']:
+						ws.append([r['date'], r['category'], r['note'], r['amount'], r['share'], r['reason']])
+					ws2 = wb.create_sheet('applied_payments')
+					ws2.append(['date', 'category', 'note', 'amount'])
+					for r in data['applied_payments']:
+						ws2.append([r['date'], r['category'], r['note'], r['amount']])
+					ws3 = wb.create_sheet('unapplied_payments')
+					ws3.append(['date', 'category', 'note', 'amount'])
+					for r in data['unapplied_payments']:
+						ws3.append([r['date'], r['category'], r['note'], r['amount']])
+					ws4 = wb.create_sheet('totals')
+					ws4.append(['total_shared', data['totals']['total_shared']])
+					ws4.append(['total_paid_by_person', data['totals']['total_paid_by_person']])
+					ws4.append(['remaining', data['totals']['remaining']])
+					wb.save(out_xlsx)
+				except Exception as e:
+					print('Lỗi khi ghi XLSX:', e)
+				else:
+					print('Đã xuất XLSX ->', out_xlsx)
+
+			elif fmt == 'pdf':
+				if not HAS_REPORTLAB:
+					print('reportlab không được cài. Bỏ qua PDF export. Cài bằng: pip install reportlab')
+					continue
+				out_pdf = os.path.join(outdir, f"{base_name}.{args.person}.summary.pdf")
+				try:
+					from reportlab.lib.pagesizes import A4
+					from reportlab.pdfgen import canvas
+					c = canvas.Canvas(out_pdf, pagesize=A4)
+					w, h = A4
+					y = h - 40
+					c.setFont('Helvetica-Bold', 12)
+					c.drawString(40, y, f"Summary for {args.person} - {base_name}")
+					y -= 24
+					c.setFont('Helvetica', 10)
+					c.drawString(40, y, f"Totals: shared={data['totals']['total_shared']} paid={data['totals']['total_paid_by_person']} remaining={data['totals']['remaining']}")
+					y -= 24
+					c.drawString(40, y, 'Shared rows:')
+					y -= 18
+					# One text object per page instead of a positioned drawString per row
+					t = c.beginText(40, y)
+					t.setFont('Helvetica', 10)
+					t.setLeading(14)
+					for r in data['shared_rows']:
+						# Break only when another row follows, so a full last page gets no blank page after it
+						if t.getY() < 80:
+							c.drawText(t)
+							c.showPage()
+							t = c.beginText(40, h - 40)
+							t.setFont('Helvetica', 10)
+							t.setLeading(14)
+						line = f"{r['date']} | {r['category']} | {r['note'] or ''} | amt:{r['amount']} | share:{r['share']}"
+						t.textLine(line[:120])
+					c.drawText(t)
+					c.save()
+				except Exception as e:
+					print('Lỗi khi ghi PDF:', e)
+				else:
+					print('Đã xuất PDF ->', out_pdf)
+
+
+if __name__ == '__main__':
+	main()
+
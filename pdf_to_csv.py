@@ -1,13 +1,37 @@
 import csv
+import multiprocessing
+import os
 import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
 from typing import Optional, List, Dict
 from datetime import datetime
 
+_WS_RE = re.compile(r"\s+")
+_CURRENCY_RE = re.compile(r"[^0-9.,-]")
+_AMOUNT_CHARS = frozenset("0123456789.,-")
+
+# Explicit line-based detection (pdfplumber's defaults, slightly looser intersections)
+_DEFAULT_TABLE_SETTINGS = {
+    'vertical_strategy': 'lines',
+    'horizontal_strategy': 'lines',
+    'intersection_tolerance': 5,
+}
+# "dd/mm/yyyy <text> <amount>" lines, for statement pages where no table is detected
+_FAST_RE = re.compile(r'(\d{2}[/-]\d{2}[/-]\d{4})\s+(.+?)\s+([\d.,()-]+)$', re.M)
+
 
 def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip()).lower()
+    return _WS_RE.sub(" ", (s or "").strip()).lower()
 
 
+# Statement cells repeat a lot ("0", "", the same fees), so parsed values are memoized
+@lru_cache(maxsize=4096)
 def _parse_amount(cell: str) -> Optional[float]:
     if cell is None:
         return None
@@ -19,19 +43,20 @@ def _parse_amount(cell: str) -> Optional[float]:
     if s.startswith("(") and s.endswith(")"):
         neg = True
         s = s[1:-1]
-    # Normalize thousand/decimal separators
-    s = s.replace("\xa0", " ").replace(" ", "")
-    # Remove currency symbols
-    s = re.sub(r"[^0-9.,-]", "", s)
-    # If both . and , exist, decide by last separator as decimal
-    if "," in s and "." in s:
-        if s.rfind(",") > s.rfind("."):
-            s = s.replace(".", "").replace(",", ".")
-        else:
-            s = s.replace(",", "")
-    else:
-        # If only comma exists and seems decimal
-        if "," in s and s.count(",") == 1 and len(s.split(",")[-1]) in (2,3):
+    # Remove spaces and currency symbols (skipped for the common already-clean cell)
+    if not _AMOUNT_CHARS.issuperset(s):
+        s = _CURRENCY_RE.sub("", s)
+    last_comma = s.rfind(",")
+    if last_comma != -1:
+        last_dot = s.rfind(".")
+        if last_dot != -1:
+            # Both . and , exist: the last one is the decimal separator
+            if last_comma > last_dot:
+                s = s.replace(".", "").replace(",", ".")
+            else:
+                s = s.replace(",", "")
+        elif s.count(",") == 1 and len(s) - last_comma - 1 in (2, 3):
+            # Only one comma and it seems decimal
             s = s.replace(",", ".")
         else:
             s = s.replace(",", "")
@@ -42,14 +67,44 @@ def _parse_amount(cell: str) -> Optional[float]:
         return None
 
 
-def extract_tables_to_csv(pdf_path: str, out_csv_path: str, table_settings: Optional[dict] = None) -> None:
-    """
-    Raw extraction: dump all tables across pages to CSV without schema mapping.
-    """
+# Process umask, read once at import (os.umask can only be read by setting it, which races with threads)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextmanager
+def _atomic_csv(out_csv_path: str):
+    """Write through a unique temp file next to out_csv_path; it replaces the target only on success."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(out_csv_path) or '.', suffix='.tmp')
+    try:
+        with open(fd, 'w', encoding='utf-8', newline='', buffering=1 << 20) as fo:
+            yield fo
+        # mkstemp creates the file 0600; give the output the mode a plain open() would
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, out_csv_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@lru_cache(maxsize=1)
+def _get_pdfplumber():
+    # Imported on first conversion rather than at app startup; the module is kept once loaded
     try:
         import pdfplumber
     except Exception as e:
         raise RuntimeError("pdfplumber is required for PDF to CSV conversion.") from e
+    return pdfplumber
+
+
+def extract_tables_to_csv(pdf_path: str, out_csv_path: str, table_settings: Optional[dict] = None) -> None:
+    """
+    Raw extraction: dump all tables across pages to CSV without schema mapping.
+    """
+    pdfplumber = _get_pdfplumber()
 
     rows: List[List[str]] = []
     with pdfplumber.open(pdf_path) as pdf:
@@ -66,13 +121,223 @@ def extract_tables_to_csv(pdf_path: str, out_csv_path: str, table_settings: Opti
                 rows.append([])
             rows.append([])
 
-    with open(out_csv_path, 'w', encoding='utf-8', newline='') as fo:
+    # Write to a temp file and rename so a crash never leaves a half-written CSV
+    with _atomic_csv(out_csv_path) as fo:
         w = csv.writer(fo)
-        for r in rows:
-            w.writerow(r)
+        w.writerows(rows)
+
 
+_SYNONYM_MAP = {
+    'date': {'date', 'ngày', 'transaction date', 'posting date', 'tanggal'},
+    'note': {'note', 'description', 'ghi chú', 'memo', 'content', 'details'},
+    'category': {'category', 'danh mục', 'loại', 'type'},
+    'amount': {'amount', 'số tiền', 'giá trị', 'value', 'số tiền (vnd)'},
+    'debit': {'debit', 'chi', 'nợ', 'dr', 'withdrawal'},
+    'credit': {'credit', 'thu', 'có', 'cr', 'deposit'},
+}
+_SYN_REVERSE = {syn: key for key, syns in _SYNONYM_MAP.items() for syn in syns}
 
-def extract_tables_to_structured_csv(pdf_path: str, out_csv_path: str) -> None:
+# Loose (substring, key) matches for headers like "Số tiền(+/-)"
+_LOOSE_MATCHES = (
+    ('amount', 'amount'), ('số tiền', 'amount'),
+    ('debit', 'debit'), ('nợ', 'debit'), ('chi', 'debit'),
+    ('credit', 'credit'), ('có', 'credit'), ('thu', 'credit'),
+    ('date', 'date'), ('ngày', 'date'),
+    ('category', 'category'), ('danh mục', 'category'), ('type', 'category'), ('loại', 'category'),
+    ('description', 'note'), ('ghi chú', 'note'), ('note', 'note'), ('memo', 'note'),
+)
+
+# Statements with at least this many pages are extracted in worker processes
+_PARALLEL_MIN_PAGES = 4
+# Each worker imports pdfplumber and reopens the PDF, so keep the pool small on memory-bound hosts
+_PARALLEL_MAX_WORKERS = 2
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _classify_headers(headers: List[str]) -> Dict[str, int]:
+    hnorm = [_norm(h) for h in headers]
+    idxs: Dict[str, int] = {}
+    for i, h in enumerate(hnorm):
+        key = _SYN_REVERSE.get(h)
+        if key:
+            idxs.setdefault(key, i)
+    # Sometimes numbers columns are named like "Số tiền(+/-)"; try loose matching
+    for i, h in enumerate(hnorm):
+        for sub, key in _LOOSE_MATCHES:
+            if key not in idxs and sub in h:
+                idxs[key] = i
+    return idxs
+
+
+# Pick the strptime format from the string's shape instead of trying each one
+_DATE_PATTERNS = [
+    (re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$'), '%Y-%m-%d'),
+    (re.compile(r'^\d{1,2}/\d{1,2}/\d{4}$'), '%d/%m/%Y'),
+    (re.compile(r'^\d{4}/\d{1,2}/\d{1,2}$'), '%Y/%m/%d'),
+    (re.compile(r'^\d{1,2}-\d{1,2}-\d{4}$'), '%d-%m-%Y'),
+    (re.compile(r'^\d{1,2}\.\d{1,2}\.\d{4}$'), '%d.%m.%Y'),
+]
+
+
+def _parse_date(s: str) -> str:
+    if not s:
+        return ''
+    s = s.strip()
+    for pat, fmt in _DATE_PATTERNS:
+        if pat.match(s):
+            try:
+                return datetime.strptime(s, fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                pass
+            break
+    # try iso split
+    try:
+        d = datetime.fromisoformat(s.split(' ')[0])
+        return d.strftime('%Y-%m-%d')
+    except Exception:
+        return s
+
+
+def _page_records(page, settings: dict) -> List[Dict[str, str]]:
+    """Map the tables of one pdfplumber page to Date/Category name/Note/Amount records."""
+    records: List[Dict[str, str]] = []
+    try:
+        tables = page.extract_tables(settings) or []
+    except Exception:
+        tables = []
+    if not tables:
+        try:
+            text = page.extract_text() or ''
+        except Exception:
+            text = ''
+        for m in _FAST_RE.finditer(text):
+            amt = _parse_amount(m.group(3))
+            records.append({
+                'Date': _parse_date(m.group(1)),
+                'Category name': '',
+                'Note': m.group(2),
+                'Amount': str(amt if amt is not None else 0),
+            })
+        return records
+    for table in tables:
+        if not table:
+            continue
+        # Clean every cell once; header detection and row mapping both reuse it
+        table = [[str(c).strip() if c is not None else '' for c in row] for row in table]
+        # Identify header row: first row with >=2 non-empty cells
+        header_row = None
+        start_idx = 0
+        for i, row in enumerate(table):
+            if len(row) - row.count('') >= 2:
+                header_row = row
+                start_idx = i + 1
+                break
+        if not header_row:
+            # no header recognized, treat each row generically
+            for cells in table:
+                # Try inferring date from first cell, amount from last numeric cell
+                date = _parse_date(cells[0]) if cells else ''
+                # Find numeric cells
+                amt = None
+                for cell in reversed(cells):
+                    val = _parse_amount(cell)
+                    if val is not None:
+                        amt = val
+                        break
+                note = ' '.join([c for c in cells[1:-1] if c])
+                rec = {
+                    'Date': date,
+                    'Category name': '',
+                    'Note': note,
+                    'Amount': str(amt if amt is not None else 0),
+                }
+                records.append(rec)
+            continue
+
+        idxs = _classify_headers(header_row)
+        for cells in table[start_idx:]:
+            if not any(cells):
+                continue
+            date = _parse_date(cells[idxs['date']]) if 'date' in idxs else _parse_date(cells[0])
+            category = cells[idxs['category']] if 'category' in idxs else ''
+            note = cells[idxs['note']] if 'note' in idxs else ''
+
+            amount_val = None
+            if 'amount' in idxs:
+                amount_val = _parse_amount(cells[idxs['amount']])
+            elif 'debit' in idxs or 'credit' in idxs:
+                dv = _parse_amount(cells[idxs['debit']]) if 'debit' in idxs else 0
+                cv = _parse_amount(cells[idxs['credit']]) if 'credit' in idxs else 0
+                try:
+                    amount_val = (cv or 0) - (dv or 0)
+                except Exception:
+                    amount_val = None
+            else:
+                # last numeric cell as amount
+                for cell in reversed(cells):
+                    val = _parse_amount(cell)
+                    if val is not None:
+                        amount_val = val
+                        break
+
+            # Aggregate other text into note if note empty
+            if not note:
+                text_cols = []
+                for i, c in enumerate(cells):
+                    if i in (idxs.get('date'), idxs.get('category'), idxs.get('amount'), idxs.get('debit'), idxs.get('credit')):
+                        continue
+                    if c and _parse_amount(c) is None:
+                        text_cols.append(c)
+                note = ' '.join(text_cols)
+
+            rec = {
+                'Date': date,
+                'Category name': category,
+                'Note': note,
+                'Amount': str(amount_val if amount_val is not None else 0),
+            }
+            records.append(rec)
+    return records
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the process-wide extraction pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn', not fork: the web workers are multi-threaded and a forked child could inherit a held lock
+            _pool = ProcessPoolExecutor(
+                max_workers=min(_PARALLEL_MAX_WORKERS, _available_cpus()),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next conversion starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page(pdf_path: str, page_index: int, settings: dict) -> List[Dict[str, str]]:
+    """Worker entry point: open the PDF in this process and extract a single page."""
+    with _get_pdfplumber().open(pdf_path) as pdf:
+        return _page_records(pdf.pages[page_index], settings)
+
+
+def extract_tables_to_structured_csv(pdf_path: str, out_csv_path: str, table_settings: Optional[dict] = None) -> None:
     """
     Extract tables and map columns to the working CSV schema:
     headers: Date, Category name, Note, Amount
@@ -83,153 +348,36 @@ def extract_tables_to_structured_csv(pdf_path: str, out_csv_path: str) -> None:
     - Parse amounts, parentheses negative; compute Amount = Credit - Debit if both exist.
     - If category missing, leave empty; note aggregates text columns.
     - Skip repeated header rows across pages.
-    """
-    try:
-        import pdfplumber
-    except Exception as e:
-        raise RuntimeError("pdfplumber is required for PDF to CSV conversion.") from e
+    - Pages without a detected table fall back to a regex over the page text.
 
-    synonym_map = {
-        'date': {'date', 'ngày', 'transaction date', 'posting date', 'tanggal'},
-        'note': {'note', 'description', 'ghi chú', 'memo', 'content', 'details'},
-        'category': {'category', 'danh mục', 'loại', 'type'},
-        'amount': {'amount', 'số tiền', 'giá trị', 'value', 'số tiền (vnd)'},
-        'debit': {'debit', 'chi', 'nợ', 'dr', 'withdrawal'},
-        'credit': {'credit', 'thu', 'có', 'cr', 'deposit'},
-    }
-
-    def classify_headers(headers: List[str]) -> Dict[str, int]:
-        hnorm = [_norm(h) for h in headers]
-        idxs: Dict[str, int] = {}
-        for i, h in enumerate(hnorm):
-            for key, syns in synonym_map.items():
-                if h in syns and key not in idxs:
-                    idxs[key] = i
-        # Sometimes numbers columns are named like "Số tiền(+/-)"; try loose matching
-        for i, h in enumerate(hnorm):
-            if 'amount' in h or 'số tiền' in h:
-                idxs.setdefault('amount', i)
-            if 'debit' in h or 'nợ' in h or 'chi' in h:
-                idxs.setdefault('debit', i)
-            if 'credit' in h or 'có' in h or 'thu' in h:
-                idxs.setdefault('credit', i)
-            if 'date' in h or 'ngày' in h:
-                idxs.setdefault('date', i)
-            if 'category' in h or 'danh mục' in h or 'type' in h or 'loại' in h:
-                idxs.setdefault('category', i)
-            if 'description' in h or 'ghi chú' in h or 'note' in h or 'memo' in h:
-                idxs.setdefault('note', i)
-        return idxs
-
-    def parse_date(s: str) -> str:
-        if not s:
-            return ''
-        s = s.strip()
-        fmts = ['%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y', '%d.%m.%Y']
-        for fmt in fmts:
-            try:
-                d = datetime.strptime(s, fmt)
-                return d.strftime('%Y-%m-%d')
-            except Exception:
-                continue
-        # try iso split
-        try:
-            d = datetime.fromisoformat(s.split(' ')[0])
-            return d.strftime('%Y-%m-%d')
-        except Exception:
-            return s
+    table_settings is passed to pdfplumber's extract_tables (default: _DEFAULT_TABLE_SETTINGS).
+    Long statements are split across a small shared process pool, one page per task; page order is kept.
+    """
+    settings = table_settings or _DEFAULT_TABLE_SETTINGS
+    pdfplumber = _get_pdfplumber()
 
-    records: List[Dict[str, str]] = []
+    records: Optional[List[Dict[str, str]]] = None
 
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            try:
-                tables = page.extract_tables() or []
-            except Exception:
-                tables = []
-            for table in tables:
-                if not table:
-                    continue
-                # Identify header row: first row with >=2 non-empty cells
-                header_row = None
-                start_idx = 0
-                for i, row in enumerate(table):
-                    non_empty = [c for c in row if (c or '').strip()]
-                    if len(non_empty) >= 2:
-                        header_row = [str(c).strip() if c is not None else '' for c in row]
-                        start_idx = i + 1
-                        break
-                if not header_row:
-                    # no header recognized, treat each row generically
-                    for row in table:
-                        cells = [str(c).strip() if c is not None else '' for c in row]
-                        # Try inferring date from first cell, amount from last numeric cell
-                        date = parse_date(cells[0]) if cells else ''
-                        # Find numeric cells
-                        amt = None
-                        for cell in reversed(cells):
-                            val = _parse_amount(cell)
-                            if val is not None:
-                                amt = val
-                                break
-                        note = ' '.join([c for c in cells[1:-1] if c])
-                        rec = {
-                            'Date': date,
-                            'Category name': '',
-                            'Note': note,
-                            'Amount': str(amt if amt is not None else 0),
-                        }
-                        records.append(rec)
-                    continue
+        n_pages = len(pdf.pages)
+        if n_pages < _PARALLEL_MIN_PAGES or _available_cpus() < 2:
+            records = [rec for page in pdf.pages for rec in _page_records(page, settings)]
 
-                idxs = classify_headers(header_row)
-                for row in table[start_idx:]:
-                    cells = [str(c).strip() if c is not None else '' for c in row]
-                    if not any(cells):
-                        continue
-                    date = parse_date(cells[idxs['date']]) if 'date' in idxs else parse_date(cells[0])
-                    category = cells[idxs['category']] if 'category' in idxs else ''
-                    note = cells[idxs['note']] if 'note' in idxs else ''
+    if records is None:
+        pool = None
+        try:
+            pool = _get_pool()
+            per_page = pool.map(_extract_page, repeat(pdf_path, n_pages), range(n_pages), repeat(settings, n_pages))
+            records = [rec for recs in per_page for rec in recs]
+        except (OSError, BrokenProcessPool):
+            # No usable process pool here (sandboxed host, spawn failure): do it inline
+            if pool is not None:
+                _discard_pool(pool)
+            with pdfplumber.open(pdf_path) as pdf:
+                records = [rec for page in pdf.pages for rec in _page_records(page, settings)]
 
-                    amount_val = None
-                    if 'amount' in idxs:
-                        amount_val = _parse_amount(cells[idxs['amount']])
-                    elif 'debit' in idxs or 'credit' in idxs:
-                        dv = _parse_amount(cells[idxs['debit']]) if 'debit' in idxs else 0
-                        cv = _parse_amount(cells[idxs['credit']]) if 'credit' in idxs else 0
-                        try:
-                            amount_val = (cv or 0) - (dv or 0)
-                        except Exception:
-                            amount_val = None
-                    else:
-                        # last numeric cell as amount
-                        for cell in reversed(cells):
-                            val = _parse_amount(cell)
-                            if val is not None:
-                                amount_val = val
-                                break
-
-                    # Aggregate other text into note if note empty
-                    if not note:
-                        text_cols = []
-                        for i, c in enumerate(cells):
-                            if i in (idxs.get('date'), idxs.get('category'), idxs.get('amount'), idxs.get('debit'), idxs.get('credit')):
-                                continue
-                            if c and _parse_amount(c) is None:
-                                text_cols.append(c)
-                        note = ' '.join(text_cols)
-
-                    rec = {
-                        'Date': date,
-                        'Category name': category,
-                        'Note': note,
-                        'Amount': str(amount_val if amount_val is not None else 0),
-                    }
-                    records.append(rec)
-
-    # Write structured CSV
-    with open(out_csv_path, 'w', encoding='utf-8', newline='') as fo:
+    # Write structured CSV (temp file + rename, as in extract_tables_to_csv)
+    with _atomic_csv(out_csv_path) as fo:
         w = csv.DictWriter(fo, fieldnames=['Date', 'Category name', 'Note', 'Amount'])
         w.writeheader()
-        for r in records:
-            w.writerow(r)
+        w.writerows(records)